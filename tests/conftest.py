@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# transcribe.py is a top-level script, not a package
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,40 @@
+import numpy as np
+
+from transcribe import merge_turns, pack_clips
+
+
+def no_split(s0, s1):
+    raise AssertionError(f"unexpected split of {s0}-{s1}")
+
+
+def test_merge_turns_unions_overlapping_turns():
+    starts = np.array([0.0, 1.0, 10.0])
+    ends = np.array([2.0, 3.0, 12.0])
+    assert merge_turns(starts, ends, pad=0.5, limit=12.2) == [(0.0, 3.5), (9.5, 12.2)]
+
+
+def test_pack_clips_packs_same_speaker_turns():
+    turns = [(0.0, 5.0, 1), (6.0, 10.0, 1), (12.0, 20.0, 1)]
+    assert pack_clips(turns, 30.0, no_split) == [(0.0, 20.0)]
+
+
+def test_pack_clips_never_crosses_a_speaker_change():
+    turns = [(0.0, 3.0, 1), (3.5, 6.0, 2), (6.5, 9.0, 1)]
+    assert pack_clips(turns, 30.0, no_split) == [(0.0, 3.0), (3.5, 6.0), (6.5, 9.0)]
+
+
+def test_pack_clips_gives_overlapping_speech_to_the_earlier_clip():
+    turns = [(0.0, 5.0, 1), (4.0, 8.0, 2), (4.5, 4.9, 3)]
+    assert pack_clips(turns, 30.0, no_split) == [(0.0, 5.0), (5.0, 8.0)]
+
+
+def test_pack_clips_splits_long_turns_with_the_splitter():
+    calls = []
+
+    def split(s0, s1):
+        calls.append((s0, s1))
+        return [(s0, 27.5), (28.0, s1)]
+
+    turns = [(0.0, 4.0, 1), (5.0, 50.0, 2), (50.5, 52.0, 2)]
+    assert pack_clips(turns, 30.0, split) == [(0.0, 4.0), (5.0, 27.5), (28.0, 52.0)]
+    assert calls == [(5.0, 50.0)]
@@ -2,15 +2,75 @@
 import argparse
 import json
 import os
+import stat
 import sys
-from datetime import timedelta
 import time
 import math
-import subprocess
-import tempfile
-import shlex
+from functools import lru_cache
+from pathlib import Path
 
-from faster_whisper import WhisperModel
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # optional: faster JSON output
+    orjson = None
+
+# Sample rate shared by Whisper and pyannote
+SAMPLE_RATE = 16000
+
+# Paragraphs may break after a segment ending in one of these
+SENTENCE_END = frozenset(".?!…")
+
+# Padding around diarization turns when they replace VAD (like Silero's speech_pad_ms)
+SPEECH_PAD_SECONDS = 0.4
+
+# Write buffer for -o output files
+OUTPUT_BUFFER_BYTES = 1 << 20
+
+# Inputs shorter than this are decoded sequentially even with --batched
+BATCHED_MIN_SECONDS = 60.0
+
+
+def default_cpu_threads() -> int:
+    # Cores this process may run on (respects taskset/cgroup pinning)
+    try:
+        return len(os.sched_getaffinity(0)) or 1
+    except (AttributeError, OSError):
+        return os.cpu_count() or 1
+
+
+def cpuinfo_field(name: str) -> str:
+    # First value of a /proc/cpuinfo field (Linux only); "" when unavailable
+    try:
+        with open("/proc/cpuinfo", "r", encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key.strip() == name:
+                    return value.strip()
+    except OSError:
+        pass
+    return ""
+
+
+def has_int8_isa() -> bool:
+    # VNNI/AMX provide native INT8 dot products; without them INT8 GEMMs are often slower than FP32
+    flags = set(cpuinfo_field("flags").split())
+    return bool(flags & {"avx512_vnni", "avx_vnni", "amx_int8"})
+
+
+def best_cpu_compute_type() -> str:
+    # CTranslate2 runs int8 as int8_float32 on CPU (INT8 GEMMs either way), so
+    # the only way to avoid INT8 GEMMs without VNNI/AMX is plain float32
+    return "int8" if has_int8_isa() else "float32"
+
+
+def resolve_compute_type(compute_type: str, device: str) -> str:
+    if compute_type != "auto":
+        return compute_type
+    if device == "cuda":
+        return "int8_float16"
+    return best_cpu_compute_type()
 
 
 def parse_args() -> argparse.Namespace:
@@ -37,8 +97,20 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--compute-type",
         dest="compute_type",
-        default=os.getenv("WHISPER_COMPUTE", "int8"),
-        help="Quantization compute type (int8, int16, float32, etc.)",
+        default=os.getenv("WHISPER_COMPUTE", "auto"),
+        help="Quantization compute type (auto, int8, int8_float32, int8_float16, float32, etc.)",
+    )
+    parser.add_argument(
+        "--cpu-threads",
+        type=int,
+        default=(int(os.getenv("WHISPER_CPU_THREADS")) if os.getenv("WHISPER_CPU_THREADS") else default_cpu_threads()),
+        help="CTranslate2 threads per worker on CPU (defaults to usable cores)",
+    )
+    parser.add_argument(
+        "--num-workers",
+        type=int,
+        default=int(os.getenv("WHISPER_NUM_WORKERS", 2)),
+        help="CTranslate2 workers allowing concurrent decoding",
     )
     parser.add_argument(
         "--task",
@@ -125,6 +197,18 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Enable VAD filtering to trim non-speech (slower, better quality)",
     )
+    parser.add_argument(
+        "--batched",
+        action=argparse.BooleanOptionalAction,
+        default=os.getenv("WHISPER_BATCHED", "1") in {"1", "true", "yes", "on"},
+        help=f"Decode VAD chunks in parallel for inputs longer than {BATCHED_MIN_SECONDS:.0f}s (faster, no cross-window context)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=(int(os.getenv("WHISPER_BATCH_SIZE")) if os.getenv("WHISPER_BATCH_SIZE") else None),
+        help="Chunks decoded per batch in batched mode (None -> 8 on CPU, 16 on CUDA)",
+    )
     parser.add_argument(
         "--beam-size",
         type=int,
@@ -157,40 +241,30 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
+# Consecutive cues usually share a boundary (end of N == start of N+1), so each
+# value tends to be formatted twice
+@lru_cache(maxsize=4096)
+def _ts(ms: int, sep: str) -> str:
+    h, rem = divmod(ms, 3_600_000)
+    m, rem = divmod(rem, 60_000)
+    sec, ms = divmod(rem, 1000)
+    return f"{h:02}:{m:02}:{sec:02}{sep}{ms:03}"
+
+
 def srt_timestamp(seconds: float) -> str:
-    if seconds is None:
-        seconds = 0.0
-    td = timedelta(seconds=max(0, seconds))
     # SRT uses comma as decimal separator
-    total_seconds = int(td.total_seconds())
-    hours = total_seconds // 3600
-    minutes = (total_seconds % 3600) // 60
-    secs = total_seconds % 60
-    millis = int(round((td.total_seconds() - total_seconds) * 1000))
-    return f"{hours:02}:{minutes:02}:{secs:02},{millis:03}"
+    return _ts(max(0, int(round(seconds * 1000))) if seconds else 0, ",")
 
 
 def vtt_timestamp(seconds: float) -> str:
-    if seconds is None:
-        seconds = 0.0
-    td = timedelta(seconds=max(0, seconds))
-    total_seconds = int(td.total_seconds())
-    hours = total_seconds // 3600
-    minutes = (total_seconds % 3600) // 60
-    secs = total_seconds % 60
-    millis = int(round((td.total_seconds() - total_seconds) * 1000))
-    return f"{hours:02}:{minutes:02}:{secs:02}.{millis:03}"
+    return _ts(max(0, int(round(seconds * 1000))) if seconds else 0, ".")
 
 
 def hms(seconds: float) -> str:
-    if seconds is None:
-        seconds = 0.0
-    seconds = max(0.0, float(seconds))
-    total = int(seconds)
-    h = total // 3600
-    m = (total % 3600) // 60
-    s = total % 60
-    return f"{h:02}:{m:02}:{s:02}"
+    total = int(seconds) if seconds and seconds > 0 else 0
+    h, rem = divmod(total, 3600)
+    m, sec = divmod(rem, 60)
+    return f"{h:02}:{m:02}:{sec:02}"
 
 
 def ts_label(seconds: float) -> str:
@@ -208,6 +282,70 @@ def ts_label(seconds: float) -> str:
         return f"{m:02}:{s:02}"
 
 
+def decode_audio(path: str) -> np.ndarray:
+    # Mono float32 PCM at SAMPLE_RATE; decoded once and shared by Whisper and pyannote
+    from faster_whisper.audio import decode_audio as fw_decode_audio
+
+    return fw_decode_audio(path, sampling_rate=SAMPLE_RATE)
+
+
+def merge_turns(starts: np.ndarray, ends: np.ndarray, *, pad: float, limit: float) -> list:
+    # Union of padded diarization turns (sorted by start) as disjoint (start, end) spans
+    spans = []
+    for s0, s1 in zip(starts.tolist(), ends.tolist()):
+        s0, s1 = max(0.0, s0 - pad), min(limit, s1 + pad)
+        if spans and s0 <= spans[-1][1]:
+            spans[-1][1] = max(spans[-1][1], s1)
+        else:
+            spans.append([s0, s1])
+    return [(s0, s1) for s0, s1 in spans]
+
+
+def pack_clips(turns: list, max_len: float, split_long) -> list:
+    # Batched decoding takes clips of at most one window, and each clip comes back
+    # attributed to whichever speaker dominates it, so clips never cross a speaker
+    # change. turns are padded (start, end, speaker) sorted by start. Consecutive
+    # turns of one speaker are packed together; overlapping speech stays with the
+    # earlier clip so no audio is decoded twice. Turns longer than a window go to
+    # split_long(start, end), which returns pieces cut at silences.
+    clips = []
+    for s0, s1, speaker in turns:
+        if clips:
+            s0 = max(s0, clips[-1][1])
+            if s1 <= s0:
+                continue
+            if speaker == clips[-1][2] and s1 - clips[-1][0] <= max_len:
+                clips[-1][1] = s1
+                continue
+        if s1 - s0 <= max_len:
+            clips.append([s0, s1, speaker])
+        else:
+            clips.extend([c0, c1, speaker] for c0, c1 in split_long(s0, s1))
+    return [(s0, s1) for s0, s1, _ in clips]
+
+
+def split_at_silences(audio: np.ndarray, s0: float, s1: float, max_len: float) -> list:
+    # Run Silero VAD on one span and merge its speech into pieces of at most max_len,
+    # the same way the batched pipeline chunks a whole file
+    from faster_whisper.vad import VadOptions, get_speech_timestamps, merge_segments
+
+    offset = int(s0 * SAMPLE_RATE)
+    opts = VadOptions(max_speech_duration_s=max_len, min_silence_duration_ms=160)
+    speech = get_speech_timestamps(audio[offset:int(s1 * SAMPLE_RATE)], opts)
+    return [
+        ((offset + c["start"]) / SAMPLE_RATE, (offset + c["end"]) / SAMPLE_RATE)
+        for c in merge_segments(speech, opts)
+    ]
+
+
+def configure_threads(cpu_threads: int) -> None:
+    # OpenMP sizing for the CPU backends (onnxruntime VAD, torch); explicit env wins
+    os.environ.setdefault("OMP_NUM_THREADS", str(cpu_threads))
+    if cpuinfo_field("vendor_id") == "GenuineIntel":
+        # Pin Intel OpenMP threads to cores to avoid migrations between GEMMs
+        os.environ.setdefault("KMP_AFFINITY", "granularity=fine,compact,1,0")
+
+
 def configure_quiet(no_warnings: bool) -> None:
     if not no_warnings:
         return
@@ -232,58 +370,81 @@ def configure_quiet(no_warnings: bool) -> None:
     os.environ.setdefault("HF_HUB_DISABLE_TELEMETRY", "1")
 
 
+def _close_paragraph(group: dict) -> dict:
+    # Fragments are stripped and non-empty, so a single space keeps natural spacing
+    group["text"] = " ".join(group.pop("parts"))
+    return group
+
+
 def _group_paragraphs(segments, *, max_gap: float, max_sec: float, min_chars: int, by_speaker: bool):
-    groups = []
+    # Yields each paragraph as soon as the next one starts, so callers can write incrementally.
+    # Text is kept as a list of fragments and joined once on close.
     current = None
-    punct = ".?!…"
 
     for seg in segments:
-        if not seg.text or not seg.text.strip():
+        text = seg.text.strip() if seg.text else ""
+        if not text:
             continue
         gap = 0.0
         if current is not None:
             gap = max(0.0, (seg.start or 0.0) - (current["end"] or 0.0))
 
+        speaker = getattr(seg, "speaker", None)
         start_new = False
         if current is None:
             start_new = True
         else:
-            if by_speaker and (getattr(seg, "speaker", None) != current.get("speaker")):
+            if by_speaker and speaker != current["speaker"]:
                 start_new = True
             elif gap > max_gap:
                 start_new = True
             else:
                 duration = (current["end"] or 0.0) - (current["start"] or 0.0)
-                ends_with_sentence = current["text"].rstrip().endswith(tuple(punct))
-                if ends_with_sentence and (len(current["text"]) >= min_chars or duration >= max_sec):
+                ends_with_sentence = current["parts"][-1][-1] in SENTENCE_END
+                if ends_with_sentence and (current["char_len"] >= min_chars or duration >= max_sec):
                     start_new = True
 
         if start_new:
+            if current is not None:
+                yield _close_paragraph(current)
             current = {
                 "start": seg.start,
                 "end": seg.end,
-                "text": seg.text.strip(),
-                "speaker": getattr(seg, "speaker", None),
+                "parts": [text],
+                "char_len": len(text),
+                "speaker": speaker,
             }
-            groups.append(current)
         else:
             current["end"] = seg.end
-            if current["text"]:
-                # Keep natural spacing; avoid double spaces
-                if not current["text"].endswith(" "):
-                    current["text"] += " "
-            current["text"] += seg.text.strip()
+            current["parts"].append(text)
+            current["char_len"] += 1 + len(text)
 
-    return groups
+    if current is not None:
+        yield _close_paragraph(current)
 
 
-def format_output(segments, fmt: str, *, txt_grouping: str, max_gap: float, max_sec: float, min_chars: int, diarized: bool, speaker_prefix: str, txt_timestamps: str = "off"):
+def _json_record(item: dict) -> str:
+    if orjson is not None:
+        return orjson.dumps(item, option=orjson.OPT_INDENT_2).decode("utf-8")
+    return json.dumps(item, ensure_ascii=False, indent=2)
+
+
+def write_output(segments, fmt: str, out_stream, *, txt_grouping: str, max_gap: float, max_sec: float, min_chars: int, diarized: bool, speaker_prefix: str, txt_timestamps: str = "off") -> None:
+    # Writes one chunk per segment/paragraph to out_stream instead of building the whole document
+    write = out_stream.write
     if fmt == "txt":
         if txt_grouping == "none":
-            return " ".join(seg.text.strip() for seg in segments if seg.text and seg.text.strip())
+            sep = ""
+            for seg in segments:
+                text = seg.text.strip() if seg.text else ""
+                if text:
+                    write(sep + text)
+                    sep = " "
         elif txt_grouping == "segments":
-            lines = [seg.text.strip() for seg in segments if seg.text and seg.text.strip()]
-            return "\n".join(lines) + ("\n" if lines else "")
+            for seg in segments:
+                text = seg.text.strip() if seg.text else ""
+                if text:
+                    write(text + "\n")
         else:  # paragraphs
             groups = _group_paragraphs(
                 segments,
@@ -292,148 +453,133 @@ def format_output(segments, fmt: str, *, txt_grouping: str, max_gap: float, max_
                 min_chars=min_chars,
                 by_speaker=diarized,
             )
-            lines = []
+            sep = ""
+            ts_range = txt_timestamps == "range"
+            ts_start = txt_timestamps != "off" and not ts_range
             for g in groups:
                 ts = ""
-                if txt_timestamps != "off":
-                    if txt_timestamps == "range":
-                        ts = f"[{ts_label(g.get('start'))} - {ts_label(g.get('end'))}] "
-                    else:  # start
-                        ts = f"[{ts_label(g.get('start'))}] "
+                if ts_range:
+                    ts = f"[{ts_label(g.get('start'))} - {ts_label(g.get('end'))}] "
+                elif ts_start:
+                    ts = f"[{ts_label(g.get('start'))}] "
                 spk = f"{speaker_prefix} {g['speaker']}: " if diarized and g.get("speaker") is not None else ""
-                prefix = f"{ts}{spk}"
-                lines.append(prefix + g["text"].strip())
-            return "\n\n".join(lines) + ("\n" if lines else "")
+                write(f"{sep}{ts}{spk}{g['text'].strip()}")
+                sep = "\n\n"
+            if sep:
+                write("\n")
     elif fmt == "srt":
-        lines = []
         idx = 1
+        sep = ""
         for seg in segments:
-            start = srt_timestamp(seg.start)
-            end = srt_timestamp(seg.end)
             text = seg.text.strip()
-            if diarized and getattr(seg, "speaker", None) is not None:
-                text = f"{speaker_prefix} {seg.speaker}: " + text
             if not text:
                 continue
-            lines.append(str(idx))
-            lines.append(f"{start} --> {end}")
-            lines.append(text)
-            lines.append("")
+            if diarized and getattr(seg, "speaker", None) is not None:
+                text = f"{speaker_prefix} {seg.speaker}: " + text
+            start = srt_timestamp(seg.start)
+            end = srt_timestamp(seg.end)
+            # Blank line goes before each cue after the first, so the file ends with a single newline
+            write(f"{sep}{idx}\n{start} --> {end}\n{text}\n")
+            sep = "\n"
             idx += 1
-        return "\n".join(lines).rstrip() + "\n"
+        if not sep:
+            write("\n")
     elif fmt == "vtt":
-        lines = ["WEBVTT", ""]
+        write("WEBVTT\n")
         for seg in segments:
-            start = vtt_timestamp(seg.start)
-            end = vtt_timestamp(seg.end)
             text = seg.text.strip()
-            if diarized and getattr(seg, "speaker", None) is not None:
-                text = f"{speaker_prefix} {seg.speaker}: " + text
             if not text:
                 continue
-            lines.append(f"{start} --> {end}")
-            lines.append(text)
-            lines.append("")
-        return "\n".join(lines).rstrip() + "\n"
+            if diarized and getattr(seg, "speaker", None) is not None:
+                text = f"{speaker_prefix} {seg.speaker}: " + text
+            start = vtt_timestamp(seg.start)
+            end = vtt_timestamp(seg.end)
+            write(f"\n{start} --> {end}\n{text}\n")
     elif fmt == "json":
-        data = []
+        # Frame the array by hand and encode one record at a time, re-indented
+        # one level, so the output matches json.dumps(list, indent=2)
+        sep = "[\n  "
         for seg in segments:
             if not seg.text or not seg.text.strip():
                 continue
             item = {"start": seg.start, "end": seg.end, "text": seg.text}
             if diarized and getattr(seg, "speaker", None) is not None:
                 item["speaker"] = str(seg.speaker)
-            data.append(item)
-        return json.dumps(data, ensure_ascii=False, indent=2)
+            write(sep + _json_record(item).replace("\n", "\n  "))
+            sep = ",\n  "
+        write("[]" if sep == "[\n  " else "\n]")
     else:
         raise ValueError(f"Unsupported format: {fmt}")
 
 
+def save_output(args: argparse.Namespace, segments, *, diarized: bool) -> None:
+    write_kwargs = dict(
+        txt_grouping=args.txt_grouping,
+        max_gap=args.max_gap,
+        max_sec=args.max_paragraph_seconds,
+        min_chars=args.min_paragraph_chars,
+        diarized=diarized,
+        speaker_prefix=args.speaker_prefix,
+        txt_timestamps=args.txt_timestamps,
+    )
+
+    if args.output:
+        out_path = Path(args.output)
+        parent = out_path.parent
+        if str(parent) not in ("", ".") and not parent.exists():
+            parent.mkdir(parents=True, exist_ok=True)
+        # Stream into a sibling .part file and swap it in when done, so a failed
+        # or interrupted run never leaves a truncated -o target behind. Devices
+        # (/dev/stdout), symlinks and files owned by someone else are written in
+        # place as before, since replacing them would change what they are;
+        # so is anything in a directory we can't create the .part file in
+        existing = out_path.is_file() and not out_path.is_symlink()
+        staged = not out_path.exists() and not out_path.is_symlink()
+        if existing:
+            st = out_path.stat()
+            staged = st.st_uid == os.geteuid() and st.st_nlink == 1
+        staged = staged and os.access(out_path.parent, os.W_OK)
+        write_path = out_path.with_suffix(out_path.suffix + ".part") if staged else out_path
+        try:
+            # Large buffer: the writer emits one small chunk per segment
+            with write_path.open("w", encoding="utf-8", buffering=OUTPUT_BUFFER_BYTES) as f:
+                write_output(segments, args.format, f, **write_kwargs)
+            if staged:
+                if existing:
+                    os.chmod(write_path, stat.S_IMODE(st.st_mode))
+                os.replace(write_path, out_path)
+        except BaseException:
+            if staged:
+                write_path.unlink(missing_ok=True)
+            raise
+        print(f"Wrote {args.format} to: {out_path}", file=sys.stderr)
+    else:
+        # Write to stdout
+        if sys.stdout.isatty() and args.format in {"srt", "vtt"}:
+            # Avoid clutter: hint when printing captions to terminal
+            print("[captions output — redirect to a file with -o]", file=sys.stderr)
+        write_output(segments, args.format, sys.stdout, **write_kwargs)
+
+
 def main() -> int:
     args = parse_args()
     configure_quiet(args.no_warnings)
+    configure_threads(args.cpu_threads)
+    # int8 and int8_float32 both run INT8 GEMMs on CPU; float32 is the real alternative
+    if args.device == "cpu" and args.compute_type in ("int8", "int8_float32") and not has_int8_isa():
+        print(f"Note: this CPU has no VNNI/AMX; --compute-type float32 (or auto) is likely faster than {args.compute_type}.", file=sys.stderr)
+    args.compute_type = resolve_compute_type(args.compute_type, args.device)
 
-    if not os.path.exists(args.input):
+    try:
+        st = os.stat(args.input)
+    except FileNotFoundError:
         print(f"Input not found: {args.input}", file=sys.stderr)
         return 1
-
-    print(
-        f"Loading model '{args.model}' on {args.device} (compute={args.compute_type})...",
-        file=sys.stderr,
-    )
-
-    model = WhisperModel(args.model, device=args.device, compute_type=args.compute_type)
-
-    print(
-        f"Transcribing '{args.input}' (language={args.language}, task={args.task})...",
-        file=sys.stderr,
-    )
-
-    t0 = time.time()
-    segments, info = model.transcribe(
-        args.input,
-        language=args.language,
-        task=args.task,
-        beam_size=args.beam_size,
-        vad_filter=args.vad,
-        # condition_on_previous_text improves coherence on longer files
-        condition_on_previous_text=True,
-    )
-
-    # Lightweight segment holder that allows attaching 'speaker'
-    class OutSeg:
-        __slots__ = ("start", "end", "text", "speaker")
-        def __init__(self, start, end, text, speaker=None):
-            self.start = start
-            self.end = end
-            self.text = text
-            self.speaker = speaker
-
-    # Consume segments with optional progress display
-    seg_list = []
-    max_end = 0.0
-    total_dur = float(getattr(info, "duration", 0.0) or 0.0)
-    is_tty = sys.stderr.isatty()
-    last_emit = 0.0
-
-    def emit_progress(force=False):
-        nonlocal last_emit
-        if not args.progress or total_dur <= 0:
-            return
-        now = time.time()
-        if not force and not is_tty and (now - last_emit) < args.progress_interval:
-            return
-        progress = min(1.0, max_end / total_dur if total_dur > 0 else 0.0)
-        elapsed = now - t0
-        speed = (max_end / elapsed) if elapsed > 0 else 0.0
-        remaining = (total_dur - max_end) / speed if speed > 0 else float('inf')
-        percent = int(progress * 100)
-        eta_str = hms(remaining) if math.isfinite(remaining) else "??:??:??"
-        msg = f"[{percent:3d}%] {hms(max_end)}/{hms(total_dur)} ETA {eta_str}"
-        if is_tty:
-            sys.stderr.write("\r" + msg)
-            sys.stderr.flush()
-        else:
-            print(msg, file=sys.stderr)
-        last_emit = now
-
-    for seg in segments:
-        out = OutSeg(seg.start, seg.end, seg.text)
-        seg_list.append(out)
-        try:
-            if out.end is not None:
-                max_end = max(max_end, float(out.end))
-                emit_progress()
-        except Exception:
-            pass
-
-    emit_progress(force=True)
-    if is_tty and args.progress:
-        sys.stderr.write("\n")
-        sys.stderr.flush()
-
-    # Optional speaker diarization
-    diarized = False
+    except OSError as e:
+        print(f"Cannot read input {args.input}: {e.strerror}", file=sys.stderr)
+        return 1
+    # Check diarization prerequisites before the empty-input shortcut, so an
+    # unusable --diarize invocation always fails the same way
     if args.diarize:
         if not args.hf_token:
             print("Diarization requires a Hugging Face token. Set HF_TOKEN or pass --hf-token.", file=sys.stderr)
@@ -444,55 +590,42 @@ def main() -> int:
             print(f"Diarization unavailable: failed to import pyannote.audio: {e}", file=sys.stderr)
             print("Try rebuilding image, or run: python -c 'import pyannote.audio' inside the container to see details.", file=sys.stderr)
             return 2
-        # Ensure audio is in a format pyannote/torchaudio can read reliably (WAV)
-        # Many containers (e.g., MP4/AAC) are not supported by soundfile backend.
-        audio_path = args.input
-        cleanup = None
-        if not str(audio_path).lower().endswith((".wav", ".flac", ".ogg")):
-            try:
-                tmp = tempfile.NamedTemporaryFile(prefix="pyannote_audio_", suffix=".wav", delete=False)
-                tmp_path = tmp.name
-                tmp.close()
-                cmd = [
-                    "ffmpeg", "-y", "-i", audio_path, "-vn",
-                    "-ac", "1", "-ar", "16000", "-f", "wav", tmp_path,
-                ]
-                print("Preparing audio for diarization (ffmpeg -> wav)...", file=sys.stderr)
-                proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                if proc.returncode != 0:
-                    print("ffmpeg failed to extract audio for diarization:", file=sys.stderr)
-                    try:
-                        err_txt = proc.stderr.decode("utf-8", errors="ignore")
-                    except Exception:
-                        err_txt = str(proc.stderr)
-                    print(err_txt, file=sys.stderr)
-                    return 2
-                audio_path = tmp_path
-                cleanup = tmp_path
-            except Exception as e:
-                print(f"Failed to prepare audio for diarization: {e}", file=sys.stderr)
-                return 2
+    if stat.S_ISREG(st.st_mode) and st.st_size == 0:
+        # Nothing to decode (pipes and devices always report size 0, so only regular files): emit an empty document without loading any model
+        print(f"Input is empty: {args.input}", file=sys.stderr)
+        save_output(args, [], diarized=False)
+        return 0
 
-        print("Running speaker diarization (pyannote)...", file=sys.stderr)
-        try:
+    try:
+        audio = decode_audio(args.input)
+    except Exception as e:
+        print(f"Failed to decode audio: {e}", file=sys.stderr)
+        return 1
+    input_dur = audio.shape[0] / SAMPLE_RATE
+
+    # Optional speaker diarization; runs before transcription (it needs the whole
+    # audio anyway) so Whisper segments can be labelled and written as they arrive
+    diarized = False
+    speech_spans = None
+    run_diarization = None
+    if args.diarize:
+        # Hand pyannote the already decoded audio as a waveform tensor;
+        # avoids a second decode and the soundfile backend's container limits
+        import torch  # type: ignore
+        waveform = torch.from_numpy(audio).unsqueeze(0)
+
+        def run_diarization():
             pipeline = PyannotePipeline.from_pretrained(args.diarize_model, use_auth_token=args.hf_token)
-            # Use explicit file mapping to support a wide range of formats
             call_kwargs = {}
             if args.num_speakers is not None:
+                # pyannote already pins min/max_speakers to num_speakers (set_num_speakers)
                 call_kwargs["num_speakers"] = int(args.num_speakers)
             # Rough progress estimation thread using an RTF guess
             stop_evt = None
             prog_thread = None
             t_dia_start = time.time()
             # Determine duration to diarize
-            dia_dur = total_dur
-            if dia_dur <= 0 and os.path.exists(audio_path):
-                try:
-                    import soundfile as sf  # type: ignore
-                    with sf.SoundFile(audio_path) as sfh:
-                        dia_dur = float(len(sfh)) / float(sfh.samplerate)
-                except Exception:
-                    dia_dur = 0.0
+            dia_dur = input_dur
 
             def start_dia_progress():
                 nonlocal stop_evt, prog_thread
@@ -500,6 +633,7 @@ def main() -> int:
                     return
                 from threading import Event, Thread
                 is_tty = sys.stderr.isatty()
+                interval = args.progress_interval
 
                 mode = (args.diarize_progress or "estimate").lower()
                 if mode == "off":
@@ -512,7 +646,7 @@ def main() -> int:
                         last = 0.0
                         while not stop_evt.is_set():
                             now = time.time()
-                            if not is_tty and (now - last) < args.progress_interval:
+                            if not is_tty and (now - last) < interval:
                                 time.sleep(0.1)
                                 continue
                             elapsed = now - t_dia_start
@@ -560,7 +694,7 @@ def main() -> int:
                     while not stop_evt.is_set():
                         now = time.time()
                         elapsed = now - t_dia_start
-                        if not is_tty and (now - last) < args.progress_interval:
+                        if not is_tty and (now - last) < interval:
                             time.sleep(0.1)
                             continue
                         frac = min(0.99, max(0.0, elapsed / max(expected, 1e-6)))
@@ -601,96 +735,231 @@ def main() -> int:
                 return finish_and_save
 
             finisher = start_dia_progress()
-            diar = pipeline({"audio": audio_path}, **call_kwargs)
+            diar = pipeline({"waveform": waveform, "sample_rate": SAMPLE_RATE}, **call_kwargs)
             if finisher:
                 finisher()
             if sys.stderr.isatty() and args.progress:
                 # Move to next line after TTY progress
                 sys.stderr.write("\n")
                 sys.stderr.flush()
-        except Exception as e:
-            print(f"Diarization failed: {e}", file=sys.stderr)
-            if cleanup:
-                try:
-                    os.unlink(cleanup)
-                except Exception:
-                    pass
+            return diar
+
+    # Diarization (if any) runs in a daemon thread while the Whisper model loads;
+    # pyannote/torch and ctranslate2 release the GIL in their native code.
+    # Daemon so a model-load error or Ctrl-C never waits on pyannote to finish
+    diar = None
+    diar_thread = None
+    diar_result = {}
+    if run_diarization is not None:
+        from threading import Thread
+
+        def diarization_worker():
+            try:
+                diar_result["diar"] = run_diarization()
+            except Exception as e:
+                diar_result["error"] = e
+
+        print("Running speaker diarization (pyannote)...", file=sys.stderr)
+        diar_thread = Thread(target=diarization_worker, daemon=True)
+        diar_thread.start()
+
+    print(
+        f"Loading model '{args.model}' on {args.device} (compute={args.compute_type}, threads={args.cpu_threads}, workers={args.num_workers})...",
+        file=sys.stderr,
+    )
+
+    # Imported here so --help and input errors skip loading ctranslate2/onnxruntime,
+    # and the thread settings above are in place before those libraries start
+    from faster_whisper import WhisperModel
+
+    model = WhisperModel(
+        args.model,
+        device=args.device,
+        compute_type=args.compute_type,
+        cpu_threads=args.cpu_threads,
+        num_workers=args.num_workers,
+    )
+
+    batched = None
+    if args.batched and input_dur > BATCHED_MIN_SECONDS:
+        try:
+            from faster_whisper import BatchedInferencePipeline
+        except ImportError:  # faster-whisper < 1.1
+            print("Batched mode needs faster-whisper >= 1.1; falling back to sequential decoding.", file=sys.stderr)
+        else:
+            batched = BatchedInferencePipeline(model=model)
+
+    if diar_thread is not None:
+        # Join with a timeout so Ctrl-C is still delivered while waiting
+        while diar_thread.is_alive():
+            diar_thread.join(0.5)
+        if "error" in diar_result:
+            print(f"Diarization failed: {diar_result['error']}", file=sys.stderr)
             return 2
+        diar = diar_result.get("diar")
 
-        # Build list of diarization segments with labels
-        diar_segs = []
+    if diar is not None:
+        # Collect diarization turns as (start, end, label)
+        turns = []
         try:
             for turn, _, speaker in diar.itertracks(yield_label=True):
-                diar_segs.append({
-                    "start": float(turn.start),
-                    "end": float(turn.end),
-                    "speaker": str(speaker),
-                })
+                turns.append((float(turn.start), float(turn.end), str(speaker)))
         except Exception:
             # Backwards compatibility if API differs
+            turns = []
             for segment, _, label in diar.itertracks(yield_label=True):
-                diar_segs.append({
-                    "start": float(getattr(segment, "start", 0.0)),
-                    "end": float(getattr(segment, "end", 0.0)),
-                    "speaker": str(label),
-                })
+                turns.append((
+                    float(getattr(segment, "start", 0.0)),
+                    float(getattr(segment, "end", 0.0)),
+                    str(label),
+                ))
 
         # Normalize speaker labels to integers starting at 1 for nicer display
         speaker_map = {}
-        next_id = 1
-        for d in diar_segs:
-            if d["speaker"] not in speaker_map:
-                speaker_map[d["speaker"]] = next_id
-                next_id += 1
-
-        # Assign speaker to each whisper segment via maximum overlap
-        def overlap(a_start, a_end, b_start, b_end):
-            return max(0.0, min(a_end, b_end) - max(a_start, b_start))
-
-        for seg in seg_list:
-            best_label = None
-            best_ov = 0.0
-            s0, s1 = float(seg.start or 0.0), float(seg.end or 0.0)
-            for d in diar_segs:
-                ov = overlap(s0, s1, d["start"], d["end"])
-                if ov > best_ov:
-                    best_ov = ov
-                    best_label = d["speaker"]
-            if best_label is not None:
-                # Attach label for downstream formatting
-                seg.speaker = speaker_map[best_label]
-                diarized = True
-        if cleanup:
-            try:
-                os.unlink(cleanup)
-            except Exception:
-                pass
+        for _, _, label in turns:
+            speaker_map.setdefault(label, len(speaker_map) + 1)
+
+        # Turns as parallel arrays sorted by start, labels pre-mapped to display ids
+        turns.sort(key=lambda t: t[0])
+        diar_starts = np.fromiter((t[0] for t in turns), dtype=np.float64, count=len(turns))
+        diar_ends = np.fromiter((t[1] for t in turns), dtype=np.float64, count=len(turns))
+        diar_labels = np.fromiter((speaker_map[t[2]] for t in turns), dtype=np.int32, count=len(turns))
+        # Turns may overlap each other; every turn before the first running-max end
+        # past s0 finishes before the segment starts
+        diar_reach = np.maximum.accumulate(diar_ends)
+
+        # Speaker of a whisper segment = diarization turn with maximum overlap
+        def speaker_of(s0, s1):
+            lo = int(diar_reach.searchsorted(s0, side="right"))
+            hi = int(diar_starts.searchsorted(s1, side="left"))
+            if lo >= hi:
+                return None
+            ov = np.minimum(s1, diar_ends[lo:hi]) - np.maximum(s0, diar_starts[lo:hi])
+            best = int(ov.argmax())
+            return int(diar_labels[lo + best]) if ov[best] > 0 else None
+
+        diarized = bool(turns)
+        # Speech regions from diarization stand in for Whisper's own VAD pass
+        speech_spans = merge_turns(diar_starts, diar_ends, pad=SPEECH_PAD_SECONDS, limit=input_dur)
+        speaker_turns = [
+            (max(0.0, s0 - SPEECH_PAD_SECONDS), min(input_dur, s1 + SPEECH_PAD_SECONDS), label)
+            for s0, s1, label in zip(diar_starts.tolist(), diar_ends.tolist(), diar_labels.tolist())
+        ]
 
-    output_text = format_output(
-        seg_list,
-        args.format,
-        txt_grouping=args.txt_grouping,
-        max_gap=args.max_gap,
-        max_sec=args.max_paragraph_seconds,
-        min_chars=args.min_paragraph_chars,
-        diarized=diarized,
-        speaker_prefix=args.speaker_prefix,
-        txt_timestamps=args.txt_timestamps,
+    print(
+        f"Transcribing '{args.input}' ({st.st_size / 1e6:.1f} MB, {hms(input_dur)}, language={args.language}, task={args.task})...",
+        file=sys.stderr,
     )
 
-    if args.output:
-        out_path = args.output
-        os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
-        with open(out_path, "w", encoding="utf-8") as f:
-            f.write(output_text)
-        print(f"Wrote {args.format} to: {out_path}", file=sys.stderr)
+    t0 = time.monotonic()
+    if batched is not None:
+        batch_size = args.batch_size or (16 if args.device == "cuda" else 8)
+        print(f"Using batched inference (batch_size={batch_size})...", file=sys.stderr)
+        clip_kwargs = {}
+        if speech_spans:
+            window = model.feature_extractor.chunk_length
+            clips = pack_clips(
+                speaker_turns,
+                window,
+                lambda s0, s1: split_at_silences(audio, s0, s1, window),
+            )
+            if clips:
+                clip_kwargs["clip_timestamps"] = [
+                    {"start": int(s0 * SAMPLE_RATE), "end": int(s1 * SAMPLE_RATE)}
+                    for s0, s1 in clips
+                ]
+        # Batched mode always splits on VAD (or the diarization clips) and decodes
+        # windows independently, so condition_on_previous_text does not apply here.
+        # Timestamps must be requested explicitly, otherwise every clip (up to 30s)
+        # comes back as a single segment.
+        segments, info = batched.transcribe(
+            audio,
+            language=args.language,
+            task=args.task,
+            beam_size=args.beam_size,
+            batch_size=batch_size,
+            without_timestamps=False,
+            vad_filter="clip_timestamps" not in clip_kwargs,
+            **clip_kwargs,
+        )
     else:
-        # Write to stdout
-        if sys.stdout.isatty() and args.format in {"srt", "vtt"}:
-            # Avoid clutter: hint when printing captions to terminal
-            print("[captions output — redirect to a file with -o]", file=sys.stderr)
-        sys.stdout.write(output_text)
+        clip_kwargs = {}
+        if speech_spans:
+            clip_kwargs["clip_timestamps"] = [t for span in speech_spans for t in span]
+        segments, info = model.transcribe(
+            audio,
+            language=args.language,
+            task=args.task,
+            beam_size=args.beam_size,
+            vad_filter=args.vad and not speech_spans,
+            # condition_on_previous_text improves coherence on longer files
+            condition_on_previous_text=True,
+            **clip_kwargs,
+        )
+
+    # Lightweight segment holder that allows attaching 'speaker'
+    class OutSeg:
+        __slots__ = ("start", "end", "text", "speaker")
+        def __init__(self, start, end, text, speaker=None):
+            self.start = start
+            self.end = end
+            self.text = text
+            self.speaker = speaker
+
+    # Consume segments with optional progress display
+    max_end = 0.0
+    total_dur = float(getattr(info, "duration", 0.0) or 0.0)
+    is_tty = sys.stderr.isatty()
+    # Segments streamed to the same terminal would interleave with the \r line
+    show_progress = args.progress and total_dur > 0 and not (is_tty and not args.output and sys.stdout.isatty())
+    # TTY redraws a single line, so it can refresh more often than logged output
+    min_gap = min(0.1, args.progress_interval) if is_tty else args.progress_interval
+    inv_total = 1.0 / total_dur if total_dur > 0 else 0.0
+    total_str = hms(total_dur)
+    last_emit = float("-inf")
+
+    def emit_progress(force=False):
+        nonlocal last_emit
+        # Throttle before doing any formatting work
+        now = time.monotonic()
+        if not force and (now - last_emit) < min_gap:
+            return
+        last_emit = now
+        progress = min(1.0, max_end * inv_total)
+        elapsed = now - t0
+        speed = (max_end / elapsed) if elapsed > 0 else 0.0
+        remaining = (total_dur - max_end) / speed if speed > 0 else float('inf')
+        percent = int(progress * 100)
+        eta_str = hms(remaining) if math.isfinite(remaining) else "??:??:??"
+        msg = f"[{percent:3d}%] {hms(max_end)}/{total_str} ETA {eta_str}"
+        if is_tty:
+            sys.stderr.write("\r" + msg)
+            sys.stderr.flush()
+        else:
+            print(msg, file=sys.stderr)
+
+    def iter_segments():
+        nonlocal max_end
+        for seg in segments:
+            out = OutSeg(seg.start, seg.end, seg.text)
+            if diarized:
+                # Attach label for downstream formatting
+                out.speaker = speaker_of(float(out.start or 0.0), float(out.end or 0.0))
+            if show_progress and out.end is not None:
+                try:
+                    max_end = max(max_end, float(out.end))
+                    emit_progress()
+                except Exception:
+                    pass
+            yield out
+
+        if show_progress:
+            emit_progress(force=True)
+        if is_tty and show_progress:
+            sys.stderr.write("\n")
+            sys.stderr.flush()
 
+    save_output(args, iter_segments(), diarized=diarized)
     return 0
 
 